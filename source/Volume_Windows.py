@@ -22,7 +22,7 @@ Change default SERIAL_PORT if necessary.
 """
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import threading, time, csv, sys
+import threading, time, sys, math, os, select, ctypes
 import numpy as np
 
 
@@ -44,13 +44,17 @@ except Exception:
 
 DEFAULT_PORT = "COM3" if sys.platform.startswith("win") else "/dev/ttyACM0"
 DEFAULT_BAUD = 9600
+REFRESH_MS = 50  # live plot refresh period (~20 FPS), independent of the sample rate
+SIM_CHUNK = 256  # max simulated samples generated per batch
+SIM_SEED = None  # int for reproducible simulated runs
+SIM_NOISE = 0.002  # bar, std of the simulated sensor noise
+POLL_S = 0.05  # longest the serial reader waits before re-checking STOP
 
 
 class PressureGUI:
     def __init__(self, root):
         self.root = root
         root.title("Pressure Acquisition & Kernel Volume")
-        self.lock = threading.Lock()
 
 
         # Serial / data state
@@ -61,15 +65,25 @@ class PressureGUI:
 
 
         self.running = False
-        self.start_time = None
-        self.time_data = []   # seconds relative to acquisition start
-        self.pressure_data = []
+        self.thread = None  # acquisition worker of the current/last run
+        self.start_time = None  # time.perf_counter_ns() at START, timestamps count from here
+        self._render_job = None  # pending root.after id of the plot refresh chain
+        # sample storage: preallocated arrays, only [:_n] is valid.
+        # Single producer / single consumer without a lock: the acquisition thread is
+        # the only writer and publishes _n after storing a sample; readers snapshot _n
+        # once and slice. 1M samples is ~28h at 10 Hz, so growth is rarely hit.
+        self._cap = 1 << 20
+        self._n = 0
+        self._reset_pending = False
+        self._t = np.empty(self._cap, dtype=np.float64)   # seconds relative to acquisition start
+        self._p = np.empty(self._cap, dtype=np.float64)
 
 
         # selection state
         self.t1 = (None, None)  # initial interval (start, end)
         self.t2 = (None, None)  # final interval (start, end)
         self.click_mode = None  # one of: 'init_start','init_end','final_start','final_end', None
+        self.show_help = tk.BooleanVar(value=False)  # also pop up selection hints as dialogs
 
 
         # GUI user params
@@ -79,6 +93,15 @@ class PressureGUI:
 
         # Sample rate hint (we will read serial lines as they arrive)
         self.sample_rate = tk.DoubleVar(value=10.0)
+        # plain float copy for the acquisition thread: Tk variables are main-thread only
+        # and each get() is a Tcl round trip
+        self._rate = 10.0
+        self._sim = False  # use_sim as of the last Start, same reason
+        self.sample_rate.trace_add("write", self._on_rate_changed)
+
+
+        # Live plot shows only the last N seconds while running (0 = whole run)
+        self.live_window = tk.DoubleVar(value=0.0)
 
 
         self.build_gui()
@@ -96,6 +119,8 @@ class PressureGUI:
         ttk.Label(top, text="Baud:").pack(side=tk.LEFT)
         ttk.Entry(top, textvariable=self.baud_rate, width=7).pack(side=tk.LEFT, padx=2)
         ttk.Checkbutton(top, text="Simulate (no Arduino)", variable=self.use_sim).pack(side=tk.LEFT, padx=8)
+        ttk.Label(top, text="Live window (s):").pack(side=tk.LEFT)
+        ttk.Entry(top, textvariable=self.live_window, width=6).pack(side=tk.LEFT, padx=2)
 
 
         ttk.Button(top, text="START", command=self.start_acquisition).pack(side=tk.LEFT, padx=6)
@@ -109,7 +134,8 @@ class PressureGUI:
         self.ax = fig.add_subplot(111)
         self.ax.set_xlabel("Time (s)")
         self.ax.set_ylabel("Pressure (bar)")
-        self.line, = self.ax.plot([], [], lw=1)
+        # animated: drawn by blitting in _refresh_plot, not by full figure draws
+        self.line, = self.ax.plot([], [], lw=1, animated=True)
 
 
         self.canvas = FigureCanvasTkAgg(fig, master=self.root)
@@ -136,6 +162,7 @@ class PressureGUI:
         ttk.Button(intf, text="Set Final Start",   command=lambda: self.set_click_mode('final_start')).pack(side=tk.LEFT, padx=2)
         ttk.Button(intf, text="Set Final End",     command=lambda: self.set_click_mode('final_end')).pack(side=tk.LEFT, padx=2)
         ttk.Button(intf, text="Auto-detect stable", command=self.auto_detect).pack(side=tk.LEFT, padx=8)
+        ttk.Checkbutton(intf, text="Show help dialogs", variable=self.show_help).pack(side=tk.LEFT, padx=4)
 
 
         # stats area
@@ -168,6 +195,11 @@ class PressureGUI:
         self.output_label.pack(anchor='w')
 
 
+        # status line for selection hints (non-modal, keeps the event loop running)
+        self.status = ttk.Label(self.root, text="")
+        self.status.pack(fill=tk.X, padx=6, pady=(0, 4))
+
+
         # span selectors (initialized later when used)
         self.span1 = None
         self.span2 = None
@@ -175,6 +207,13 @@ class PressureGUI:
 
     def _setup_plot_events(self):
         self.canvas.mpl_connect("button_press_event", self._on_plot_click)
+        # cached axes background for blitting, recaptured after every full draw
+        # (first draw, resize, toolbar pan/zoom, axis rescale)
+        self._bg = None
+        self._lims = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        # zooming in switches the line back to full resolution (see _line_data)
+        self.ax.callbacks.connect("xlim_changed", self._on_xlim_changed)
 
 
     # ----------------- Serial / acquisition -----------------
@@ -185,6 +224,7 @@ class PressureGUI:
             if self.ser and self.ser.is_open:
                 return True
             self.ser = serial.Serial(self.serial_port.get(), int(self.baud_rate.get()), timeout=1)
+            self._set_low_latency()
             # small pause to let Arduino reset if it does
             time.sleep(1.5)
             return True
@@ -194,16 +234,29 @@ class PressureGUI:
             self.ser = None
             return False
 
+    def _set_low_latency(self):
+        # Linux USB-serial drivers batch bytes for up to 16 ms unless told not to;
+        # the call is missing on Windows/macOS and fails on some adapters.
+        try:
+            self.ser.set_low_latency_mode(True)
+        except (AttributeError, NotImplementedError, OSError, ValueError):
+            pass
+
 
     def start_acquisition(self):
         if self.running:
             return
+        # after a quick STOP->START the old worker may still be in select()/sleep; it would
+        # see running again and keep writing. The storage allows a single writer only.
+        if self.thread is not None:
+            self.thread.join()
         ok = self.open_serial()
+        self._sim = self.use_sim.get()  # after open_serial, which may fall back to simulation
         self.running = True
-        with self.lock:
-            self.time_data = []
-            self.pressure_data = []
-        self.start_time = time.time()
+        self._n = 0
+        self._reset_pending = False
+        self._on_rate_changed()
+        self.start_time = time.perf_counter_ns()
         # if hardware, tell Arduino to start
         if self.ser:
             try:
@@ -213,6 +266,7 @@ class PressureGUI:
         # if sim, nothing to send
         self.thread = threading.Thread(target=self._acquire_loop, daemon=True)
         self.thread.start()
+        self._render_tick()
 
 
     def stop_acquisition(self):
@@ -226,65 +280,287 @@ class PressureGUI:
             except Exception:
                 pass
             # don't close serial here, leave it open for reuse
+        if self._render_job is not None:
+            self.root.after_cancel(self._render_job)
+            self._render_job = None
         # final refresh
         self._refresh_plot()
         self.update_stats_labels()
 
 
+    def _on_rate_changed(self, *args):
+        try:
+            self._rate = max(1.0, float(self.sample_rate.get()))
+        except (tk.TclError, ValueError):
+            pass  # half-typed value, keep the last good rate
+
+
     def _acquire_loop(self):
         # Read serial lines as they arrive (hardware) or generate simulated data at sample_rate (simulate).
-        if self.use_sim.get():
-            # simulated run: hold baseline for 6s then drop to simulate valve opening
+        self._pin_acquire_thread()
+        if self._sim:
+            # simulated run: hold baseline for 6s then drop to simulate valve opening.
+            # Samples are generated in batches (about one per plot refresh) on a uniform
+            # time grid and stored once their timestamps have passed.
+            # PCG64 Generator owned by this thread: no shared global state or lock
+            rng = np.random.default_rng(SIM_SEED)
+            t_next = 0.0
             while self.running:
-                t = time.time() - self.start_time
-                base = 1.013 if t < 6.0 else 0.40  # bar
-                p = base + np.random.normal(scale=0.002)
-                with self.lock:
-                    self.time_data.append(t)
-                    self.pressure_data.append(p)
-                if len(self.time_data) % max(1,int(self.sample_rate.get()/2)) == 0:
-                    self._refresh_plot()
-                time.sleep(1.0 / max(1.0, self.sample_rate.get()))
+                rate = self._rate
+                chunk = min(SIM_CHUNK, max(1, int(rate * REFRESH_MS / 1000.0)))
+                t = t_next + np.arange(chunk) / rate
+                t_next += chunk / rate
+                base = np.where(t < 6.0, 1.013, 0.40)  # bar
+                p = base + rng.standard_normal(chunk) * SIM_NOISE
+                # sleep to the block's absolute end time, so late wakeups don't add up;
+                # after a long stall (>1 s) jump ahead rather than replay the backlog
+                delay = t_next - (time.perf_counter_ns() - self.start_time) * 1e-9
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -1.0:
+                    t_next -= delay
+                if not self.running:
+                    break  # STOP came during the sleep; it has already flushed and redrawn
+                self._append_block(t, p)
             return
 
 
         # hardware: read lines produced by Arduino
         # Arduino is expected to print a single numeric pressure per line (e.g., "0.012345\n")
+        # Drain whatever the OS has buffered in one read and parse all complete lines at
+        # once; the bytes after the last newline are kept for the next round.
+        # On POSIX the thread sleeps in select() until data arrives; Windows has no
+        # selectable fd for a serial port, so it polls in_waiting instead.
+        fd = None
+        if os.name == "posix":
+            try:
+                fd = self.ser.fileno()
+            except Exception:
+                fd = None
+        buf = bytearray()
+        t_prev = 0.0
         while self.running and self.ser:
             try:
-                line = self.ser.readline().decode('utf-8').strip()
+                if fd is not None:
+                    r, _, _ = select.select([fd], [], [], POLL_S)
+                    if not r:
+                        continue
+                elif not self.ser.in_waiting:
+                    time.sleep(POLL_S / 5)
+                    continue
+                chunk = self.ser.read(max(1, self.ser.in_waiting))
             except Exception:
-                line = ""
-            if not line:
+                chunk = b""
+            if not chunk:
+                continue
+            buf += chunk
+            k = buf.rfind(b"\n")
+            if k < 0:
+                continue
+            lines = bytes(buf[:k]).split(b"\n")
+            del buf[:k+1]
+            p = self._parse_lines(lines)
+            if p.size == 0:
                 continue
-            # ignore echo text from Arduino that isn't numeric
+            # monotonic ns clock; the integer difference keeps full resolution and is
+            # converted to seconds once (float64 holds ns exactly for ~100 days)
+            t = (time.perf_counter_ns() - self.start_time) * 1e-9
+            # the batch arrived since the last read: spread it evenly up to now instead of
+            # giving every sample the same stamp, but over no more than it takes at the
+            # nominal rate so an idle gap isn't smeared into the data
+            lo = max(t_prev, t - p.size / self._rate)
+            self._append_block(np.linspace(lo, t, p.size + 1)[1:], p)
+            t_prev = t
+
+
+    def _parse_lines(self, lines):
+        # one vectorized parse for the common all-numeric batch; otherwise go line by
+        # line to skip echo text from the Arduino that isn't numeric. Lines stay bytes:
+        # NumPy and float() parse the ASCII digits directly, there is no UTF-8 decode.
+        try:
+            return np.array(lines).astype(np.float64)
+        except ValueError:
+            pass
+        vals = []
+        for line in lines:
             try:
-                p = float(line)
-            except Exception:
+                vals.append(float(line))
+            except ValueError:
                 # optionally show debug prints
                 # print("non-numeric from arduino:", line)
                 continue
-            t = time.time() - self.start_time
-            with self.lock:
-                self.time_data.append(t)
-                self.pressure_data.append(p)
-            # update plot occasionally
-            if len(self.time_data) % max(1,int(self.sample_rate.get()/2)) == 0:
-                self._refresh_plot()
-        # finish
-        self._refresh_plot()
+        return np.array(vals, dtype=np.float64)
+
+
+    def _pin_acquire_thread(self):
+        # Best effort: give the acquisition thread its own core (the last one, the Tk
+        # thread keeps the rest) so GUI work doesn't preempt it and jitter timestamps.
+        # The GIL is released in select/read/sleep, which is where this thread waits.
+        try:
+            if hasattr(os, "sched_setaffinity"):
+                # Linux: pid 0 is the calling thread
+                cores = sorted(os.sched_getaffinity(0))
+                if len(cores) > 1:
+                    os.sched_setaffinity(0, {cores[-1]})
+            elif sys.platform.startswith("win"):
+                k32 = ctypes.windll.kernel32
+                h = k32.GetCurrentThread()
+                n_cpu = min(os.cpu_count() or 1, 64)
+                if n_cpu > 1:
+                    k32.SetThreadAffinityMask(h, ctypes.c_size_t(1 << (n_cpu - 1)))
+                k32.SetThreadPriority(h, 1)  # THREAD_PRIORITY_ABOVE_NORMAL
+        except Exception as e:
+            print(f"⚠️ Could not pin acquisition thread: {e}")
+
+
+    def _reserve(self, k):
+        # only called from the acquisition thread: returns the write index for k new
+        # samples, applying a pending clear and growing the arrays if needed
+        n = self._n
+        if self._reset_pending:
+            self._reset_pending = False
+            n = 0
+        if n + k > self._cap:
+            # swap in the grown arrays before publishing a larger _n
+            while n + k > self._cap:
+                self._cap *= 2
+            self._t = np.resize(self._t, self._cap)
+            self._p = np.resize(self._p, self._cap)
+        return n
+
+
+    def _append_block(self, t, p):
+        # one slice assignment per array
+        k = len(t)
+        n = self._reserve(k)
+        self._t[n:n+k] = t
+        self._p[n:n+k] = p
+        self._n = n + k
 
 
     # ----------------- plotting / selection -----------------
+    def _render_tick(self):
+        # Tk thread only: the worker just writes samples, all canvas work happens here
+        self._render_job = None
+        if not self.running:
+            return
+        self._refresh_plot()
+        self._render_job = self.root.after(REFRESH_MS, self._render_tick)
+
+
     def _refresh_plot(self):
-        with self.lock:
-            if len(self.time_data) == 0:
-                return
-            self.line.set_data(self.time_data, self.pressure_data)
-            self.ax.relim(); self.ax.autoscale_view()
-        # draw current interval spans as patches by clearing old rectangles and re-drawing:
-        # (for simplicity, we'll just re-create span selectors when intervals set)
-        self.canvas.draw_idle()
+        n = self._n
+        if n == 0:
+            return
+        self._set_line_data(*self._line_data(n))
+        self._autoscale(n)
+        lims = (self.ax.get_xlim(), self.ax.get_ylim())
+        if self._bg is None or lims != self._lims:
+            # ticks/labels changed: full redraw, _on_draw recaptures the background
+            self._lims = lims
+            self.canvas.draw_idle()
+            return
+        # only the line changed: restore the background and blit the line on top
+        self.canvas.restore_region(self._bg)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
+
+
+    def _live_window(self):
+        # seconds of history the live plot shows, 0 = whole run (always after STOP)
+        if not self.running:
+            return 0.0
+        try:
+            return max(0.0, float(self.live_window.get()))
+        except (tk.TclError, ValueError):
+            return 0.0
+
+
+    def _line_data(self, n):
+        # Only the samples that can be seen are used: the live window's tail, or the
+        # visible x range when zoomed/panned (plus one sample each side so the line
+        # runs to the edges). Both are found by bisection on the monotonic times, so
+        # the cost is bounded by what is shown, not by the run length.
+        # Past ~4 samples per horizontal pixel, bin the samples (one bin per pixel) and
+        # keep each bin's min and max, so spikes stay visible while Agg only strokes
+        # O(pixels) segments. Otherwise the samples are used as is (views, no copy).
+        t_all = self._t[:n]
+        if self.ax.get_autoscalex_on():
+            win = self._live_window()
+            i0 = int(np.searchsorted(t_all, t_all[-1] - win, 'left')) if win else 0
+            i1 = n
+        else:
+            lo, hi = self.ax.get_xlim()
+            i0 = max(0, int(np.searchsorted(t_all, lo, 'left')) - 1)
+            i1 = min(n, int(np.searchsorted(t_all, hi, 'right')) + 1)
+        t = self._t[i0:i1]
+        p = self._p[i0:i1]
+        w_px = max(1, int(self.ax.bbox.width))
+        if t.size <= 4 * w_px:
+            return t, p
+        # b samples per bin, a power of two, with bins starting at multiples of b in
+        # absolute sample index: edges stay put as samples arrive (no shimmer), only the
+        # last, partial bin changes, and the layout only changes when the count doubles
+        b = 1 << math.ceil(math.log2(t.size / w_px))
+        idx = np.arange(-i0 % b, t.size, b)
+        if idx.size == 0 or idx[0] != 0:
+            idx = np.concatenate(([0], idx))
+        last = np.append(idx[1:], t.size) - 1
+        x = np.repeat((t[idx] + t[last]) / 2, 2)
+        y = np.column_stack((np.minimum.reduceat(p, idx), np.maximum.reduceat(p, idx))).ravel()
+        return x, y
+
+
+    def _set_line_data(self, x, y):
+        # Line2D.set_data copies its inputs (Matplotlib >= 3.7). x/y are already
+        # contiguous float64 (views into the sample arrays or fresh decimated arrays),
+        # so hand them over as is and let the line recache lazily at draw time.
+        line = self.line
+        if hasattr(line, "_xorig") and hasattr(line, "_invalidx"):
+            line._xorig = x
+            line._yorig = y
+            line._invalidx = line._invalidy = True
+            line.stale = True
+        else:
+            line.set_data(x, y)
+
+
+    def _on_xlim_changed(self, ax):
+        # only a user zoom/pan (autoscale-x off) changes what _line_data selects; the
+        # set_xlim in _autoscale fires this too, after _refresh_plot already did it
+        if self._n and not ax.get_autoscalex_on():
+            self._set_line_data(*self._line_data(self._n))
+
+
+    def _autoscale(self, n):
+        # y follows the data; x is rounded up to 10 s * 2^k so it only rescales when
+        # the run doubles in length and the blit background stays valid in between.
+        # A live window scrolls in quarter-window steps for the same reason.
+        self.ax.relim(); self.ax.autoscale_view(scalex=False)
+        if not self.ax.get_autoscalex_on():
+            return
+        win = self._live_window()
+        if win:
+            step = win / 4
+            hi = math.ceil(self._t[n-1] / step) * step
+            self.ax.set_xlim(hi - win - step, hi, auto=None)
+        else:
+            t0 = self._t[0]
+            span = max(self._t[n-1] - t0, 1e-9)
+            if self.running:
+                # rounding only serves the live blit; a stopped run is shown tight
+                span = 10.0 * 2.0 ** max(0, math.ceil(math.log2(span / 10.0)))
+            self.ax.set_xlim(t0, t0 + span, auto=None)
+
+
+    def _on_draw(self, event):
+        # saving to PDF/SVG from the toolbar draws on a temporary vector canvas, which
+        # has no background to capture
+        if event.canvas is not self.canvas:
+            return
+        self._bg = self.canvas.copy_from_bbox(self.ax.bbox)
+        # the line is animated so a full draw leaves it out, put it back on top
+        self.ax.draw_artist(self.line)
 
 
     def enable_span1(self):
@@ -292,14 +568,21 @@ class PressureGUI:
         if self.span1 is not None:
             self.span1.set_active(False)
         self.span1 = SpanSelector(self.ax, self.onselect1, 'horizontal', useblit=True, props=dict(alpha=0.3, facecolor='red'))
-        messagebox.showinfo("Select Initial Interval", "Drag on the plot to select the INITIAL (atmosphere) interval (red).")
+        self._hint("Select Initial Interval", "Drag on the plot to select the INITIAL (atmosphere) interval (red).")
 
 
     def enable_span2(self):
         if self.span2 is not None:
             self.span2.set_active(False)
         self.span2 = SpanSelector(self.ax, self.onselect2, 'horizontal', useblit=True, props=dict(alpha=0.3, facecolor='blue'))
-        messagebox.showinfo("Select Final Interval", "Drag on the plot to select the FINAL (after valve open) interval (blue).")
+        self._hint("Select Final Interval", "Drag on the plot to select the FINAL (after valve open) interval (blue).")
+
+
+    def _hint(self, title, text):
+        # a modal dialog would block the Tk loop (and the live plot) until dismissed
+        self.status.config(text=text)
+        if self.show_help.get():
+            messagebox.showinfo(title, text)
 
 
     def onselect1(self, xmin, xmax):
@@ -319,7 +602,7 @@ class PressureGUI:
     def set_click_mode(self, mode):
         # allow one click to set a particular endpoint; next click on plot sets the time
         self.click_mode = mode
-        messagebox.showinfo("Click-mode", f"Click on the plot to set {mode.replace('_',' ')}")
+        self._hint("Click-mode", f"Click on the plot to set {mode.replace('_',' ')}")
 
 
     def _on_plot_click(self, event):
@@ -12,7 +12,7 @@ Tkinter GUI that:
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import threading, time, csv, sys
+import threading, time, sys, math
 import numpy as np
 
 # plotting
@@ -30,12 +30,13 @@ except Exception:
     HAS_SERIAL = False
 
 DEFAULT_BAUD = 9600
+REFRESH_MS = 40  # live plot refresh period (25 FPS), independent of the sample rate
+LIVE_WINDOW_S = 60.0  # seconds of history shown while running, 0 = whole run
 
 class PressureGUI:
     def __init__(self, root):
         self.root = root
         root.title("Pressure Acquisition & Kernel Volume")
-        self.lock = threading.Lock()
 
         # Serial / data state
         self.serial_port = tk.StringVar(value="AUTO")  # now AUTO by default
@@ -44,9 +45,21 @@ class PressureGUI:
         self.ser = None
 
         self.running = False
-        self.start_time = None
-        self.time_data = []
-        self.pressure_data = []
+        self.thread = None
+        self.start_time = None  # time.perf_counter_ns() at START, timestamps count from here
+        self._render_job = None  # pending root.after id of the plot refresh chain
+        # preallocated sample arrays, doubled when full; only [:n] is valid. No lock:
+        # the acquisition thread is the only writer and bumps n after storing a sample,
+        # readers take n once and slice.
+        self._cap = 4096
+        self.n = 0
+        self._reset_pending = False  # Clear Data while running, applied by the writer
+        # plain copies of use_sim/sample_rate taken at Start for the acquisition thread:
+        # Tk variables are main-thread only
+        self._sim = False
+        self._rate = 10.0
+        self.time_data = np.empty(self._cap, dtype=np.float64)
+        self.pressure_data = np.empty(self._cap, dtype=np.float64)
 
         # selection state
         self.t1 = (None, None)
@@ -80,7 +93,8 @@ class PressureGUI:
         self.ax = fig.add_subplot(111)
         self.ax.set_xlabel("Time (s)")
         self.ax.set_ylabel("Pressure (bar)")
-        self.line, = self.ax.plot([], [], lw=1)
+        # animated: blitted by _refresh_plot, left out of full figure draws
+        self.line, = self.ax.plot([], [], lw=1, animated=True)
 
         self.canvas = FigureCanvasTkAgg(fig, master=self.root)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
@@ -89,6 +103,10 @@ class PressureGUI:
 
     def _setup_plot_events(self):
         self.canvas.mpl_connect("button_press_event", self._on_plot_click)
+        # blit background, recaptured after every full draw (resize, pan/zoom, rescale)
+        self._bg = None
+        self._lims = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
 
     # ----------------- Serial / acquisition -----------------
     def open_serial(self):
@@ -108,6 +126,7 @@ class PressureGUI:
             for port in ports_to_try:
                 try:
                     self.ser = serial.Serial(port, int(self.baud_rate.get()), timeout=1)
+                    self._set_low_latency()
                     time.sleep(2)  # wait for Arduino reset
                     self.serial_port.set(port)
                     print(f"✅ Connected to Arduino on {port}")
@@ -124,15 +143,27 @@ class PressureGUI:
             self.ser = None
             return False
 
+    def _set_low_latency(self):
+        # Linux USB-serial drivers batch bytes for up to 16 ms unless told not to;
+        # the call is missing on Windows/macOS and fails on some adapters.
+        try:
+            self.ser.set_low_latency_mode(True)
+        except (AttributeError, NotImplementedError, OSError, ValueError):
+            pass
+
     def start_acquisition(self):
         if self.running:
             return
+        # one writer only: a quick STOP->START must not overlap the previous worker
+        if self.thread is not None:
+            self.thread.join()
         ok = self.open_serial()
+        self._sim = self.use_sim.get()  # after open_serial, which may fall back to simulation
+        self._rate = max(1.0, self.sample_rate.get())
         self.running = True
-        with self.lock:
-            self.time_data = []
-            self.pressure_data = []
-        self.start_time = time.time()
+        self.n = 0
+        self._reset_pending = False
+        self.start_time = time.perf_counter_ns()  # monotonic: NTP steps can't move it
         if self.ser:
             try:
                 self.ser.write(b"start\n")
@@ -140,6 +171,7 @@ class PressureGUI:
                 pass
         self.thread = threading.Thread(target=self._acquire_loop, daemon=True)
         self.thread.start()
+        self._render_tick()
 
     def stop_acquisition(self):
         if not self.running:
@@ -150,77 +182,166 @@ class PressureGUI:
                 self.ser.write(b"stop\n")
             except Exception:
                 pass
+        if self._render_job is not None:
+            self.root.after_cancel(self._render_job)
+            self._render_job = None
         self._refresh_plot()
 
     def _acquire_loop(self):
-        if self.use_sim.get():
+        if self._sim:
+            # blocks of k samples (about one per redraw) on a uniform time grid, each
+            # stored once its last timestamp has passed; absolute deadlines, so a late
+            # wakeup doesn't push later blocks back
+            rate = self._rate
+            k = max(1, int(rate * REFRESH_MS / 1000.0))
+            rng = np.random.default_rng()  # PCG64, owned by this thread
+            t_next = 0.0
             while self.running:
-                t = time.time() - self.start_time
-                base = 1.013 if t < 6.0 else 0.40
-                p = base + np.random.normal(scale=0.002)
-                with self.lock:
-                    self.time_data.append(t)
-                    self.pressure_data.append(p)
-                if len(self.time_data) % max(1,int(self.sample_rate.get()/2)) == 0:
-                    self._refresh_plot()
-                time.sleep(1.0 / max(1.0, self.sample_rate.get()))
+                t = t_next + np.arange(k) / rate
+                t_next += k / rate
+                p = np.where(t < 6.0, 1.013, 0.40) + rng.normal(scale=0.002, size=k)
+                delay = t_next - (time.perf_counter_ns() - self.start_time) * 1e-9
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -1.0:
+                    t_next -= delay  # stalled, jump ahead rather than replay the backlog
+                if not self.running:
+                    break  # stopped during the sleep, after the final refresh
+                self._append_block(t, p)
             return
 
+        buf = bytearray()
+        t_prev = 0.0
         while self.running and self.ser:
             try:
-                line = self.ser.readline().decode('utf-8').strip()
+                # everything already buffered in one call; blocks (up to timeout) only when idle
+                chunk = self.ser.read(max(1, self.ser.in_waiting))
             except Exception:
-                line = ""
-            if not line:
+                chunk = b""
+            if not chunk:
                 continue
+            buf += chunk
+            k = buf.rfind(b"\n")
+            if k < 0:
+                continue
+            lines = bytes(buf[:k]).split(b"\n")
+            del buf[:k + 1]
             try:
-                p = float(line)
-            except Exception:
+                # one C-level parse when every line is numeric (the usual case)
+                p = np.array(lines).astype(np.float64)
+            except ValueError:
+                p = []
+                for line in lines:
+                    try:
+                        p.append(float(line))
+                    except ValueError:
+                        continue
+                p = np.array(p, dtype=np.float64)
+            if p.size == 0:
                 continue
-            t = time.time() - self.start_time
-            with self.lock:
-                self.time_data.append(t)
-                self.pressure_data.append(p)
-            if len(self.time_data) % max(1,int(self.sample_rate.get()/2)) == 0:
-                self._refresh_plot()
+            # spread the batch evenly up to now, over at most its length at the nominal rate
+            t = (time.perf_counter_ns() - self.start_time) * 1e-9
+            lo = max(t_prev, t - p.size / self._rate)
+            self._append_block(np.linspace(lo, t, p.size + 1)[1:], p)
+            t_prev = t
+
+    def _render_tick(self):
+        # Tk thread only: the worker just stores samples and never calls into Tk
+        # (with threaded Tcl that blocks until the main loop runs it, which deadlocks
+        # against the join in start_acquisition); all canvas work happens here
+        self._render_job = None
+        if not self.running:
+            return
         self._refresh_plot()
+        self._render_job = self.root.after(REFRESH_MS, self._render_tick)
+
+    def _append_block(self, t, p):
+        # amortized O(1) per sample: one slice assignment per array, doubled when full
+        if self._reset_pending:
+            self._reset_pending = False
+            self.n = 0
+        n, k = self.n, len(t)
+        if n + k > self._cap:
+            while n + k > self._cap:
+                self._cap *= 2
+            self.time_data = np.resize(self.time_data, self._cap)
+            self.pressure_data = np.resize(self.pressure_data, self._cap)
+        self.time_data[n:n+k] = t
+        self.pressure_data[n:n+k] = p
+        self.n = n + k
 
     # ----------------- plotting -----------------
     def _refresh_plot(self):
-        with self.lock:
-            if len(self.time_data) == 0:
-                return
-            self.line.set_data(self.time_data, self.pressure_data)
-            self.ax.relim(); self.ax.autoscale_view()
-        self.canvas.draw_idle()
+        n = self.n
+        if n == 0:
+            return
+        # while running only the window's tail is handed to matplotlib (a view found by
+        # bisection on the monotonic times), so draw cost doesn't grow with the run;
+        # the full history stays in the arrays for Save and is shown after STOP
+        win = LIVE_WINDOW_S if self.running else 0.0
+        i0 = int(np.searchsorted(self.time_data[:n], self.time_data[n-1] - win)) if win else 0
+        self.line.set_data(self.time_data[i0:n], self.pressure_data[i0:n])
+        self._autoscale(n, win)
+        lims = (self.ax.get_xlim(), self.ax.get_ylim())
+        if self._bg is None or lims != self._lims:
+            # ticks changed: full draw, _on_draw recaptures the background
+            self._lims = lims
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._bg)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
+
+    def _autoscale(self, n, win):
+        # x span rounded up to 10 s * 2^k, so limits (and the blit background) only
+        # change when the run doubles in length; a live window scrolls in quarter-window
+        # steps for the same reason
+        self.ax.relim(); self.ax.autoscale_view(scalex=False)
+        if not self.ax.get_autoscalex_on():
+            return
+        if win:
+            step = win / 4
+            hi = math.ceil(self.time_data[n-1] / step) * step
+            self.ax.set_xlim(hi - win - step, hi, auto=None)
+        else:
+            t0 = self.time_data[0]
+            span = max(self.time_data[n-1] - t0, 1e-9)
+            if self.running:
+                # rounding only serves the live blit; a stopped run is shown tight
+                span = 10.0 * 2.0 ** max(0, math.ceil(math.log2(span / 10.0)))
+            self.ax.set_xlim(t0, t0 + span, auto=None)
+
+    def _on_draw(self, event):
+        if event.canvas is not self.canvas:
+            return  # toolbar save to PDF/SVG draws on a temporary vector canvas
+        self._bg = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
 
     def _on_plot_click(self, event):
         pass  # left as in your original for interval selection, unchanged
 
     # ----------------- saving -----------------
     def save_csv(self):
-        with self.lock:
-            if not self.time_data:
-                messagebox.showwarning("No data", "No data to save.")
-                return
-            t = list(self.time_data)
-            p = list(self.pressure_data)
+        n = self.n
+        if n == 0:
+            messagebox.showwarning("No data", "No data to save.")
+            return
+        data = np.column_stack((self.time_data[:n], self.pressure_data[:n]))
         fname = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files","*.csv")])
         if not fname:
             return
         try:
-            with open(fname, "w", newline="") as f:
-                w = csv.writer(f)
-                w.writerow(["time_s","pressure"])
-                for ti, pi in zip(t,p):
-                    w.writerow([f"{ti:.6f}", f"{pi:.6f}"])
-            messagebox.showinfo("Saved", f"Saved {len(t)} rows to {fname}")
+            np.savetxt(fname, data, fmt="%.6f", delimiter=",", header="time_s,pressure", comments="")
+            messagebox.showinfo("Saved", f"Saved {n} rows to {fname}")
         except Exception as e:
             messagebox.showerror("Save error", f"Could not save file: {e}")
 
     def clear_data(self):
-        with self.lock:
-            self.time_data.clear(); self.pressure_data.clear()
+        if self.running:
+            # the acquisition thread owns n, let it reset on its next sample
+            self._reset_pending = True
+        else:
+            self.n = 0
         self._refresh_plot()
 
 def main():